@@ -1,31 +1,200 @@
 #!/usr/bin/env python3
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, session
+from jinja2 import FileSystemBytecodeCache
 import sqlite3
 import os
+import hashlib
+import ipaddress
+import re
 import dns.resolver
 import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    from pystemd.systemd1 import Manager as SystemdManager
+except ImportError:
+    SystemdManager = None  # Fall back to shelling out to systemctl
+
+try:
+    from waitress import serve
+except ImportError:
+    serve = None  # Fall back to the Werkzeug development server
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)  # Required for flashing messages
 DB_PATH = 'records.db'
+SECRET_KEY_PATH = '/etc/unbinder/secret'
 UNBOUND_CONFIG_PATH = '/etc/unbound/unbound.conf.d/local-data.conf'
 BASE_DOMAIN = 'avexys.com'
-
-def restart_unbound():
-    """Safely restart the unbound service using systemctl."""
+CNAME_MAX_CACHE_TTL = 900  # Upper bound in seconds on how long a CNAME resolution is cached
+CNAME_CACHE_SIZE = 4096  # Maximum number of cached CNAME resolutions
+CNAME_REFRESH_INTERVAL = 300  # Seconds between background CNAME refreshes
+CNAME_REFRESH_WORKERS = 16  # Concurrent DNS lookups during a refresh
+REGEN_DELAY = 0.5  # Seconds to wait for further changes before regenerating the config
+RECONCILE_INTERVAL = 60  # Seconds between checks that unbound matches the database
+WEB_THREADS = 16  # Request threads, so a request waiting on DNS doesn't stall the rest
+# Upstream resolvers for CNAME lookups, e.g. ['1.1.1.1', '8.8.8.8', '9.9.9.9'].
+# Leave empty to use the nameservers from /etc/resolv.conf.
+UPSTREAM_NAMESERVERS = []
+
+# Hostname without a trailing dot, checked before touching DNS or the database
+_DOMAIN_RE = re.compile(r'^(?=.{1,253}\Z)(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,}\Z', re.I | re.A)
+
+def _read_secret_key():
+    """Return the persisted key, or None if it is missing or truncated."""
+    try:
+        with open(SECRET_KEY_PATH, 'rb') as f:
+            key = f.read()
+    except FileNotFoundError:
+        return None
+    return key if len(key) >= 32 else None
+
+def load_secret_key():
+    """Read the persisted session signing key, creating it on first run.
+    Keeping it across restarts means pending flash messages survive a restart.
+    """
+    key = _read_secret_key()
+    if key:
+        return key
+    key = os.urandom(32)
+    try:
+        key_dir = os.path.dirname(SECRET_KEY_PATH)
+        os.makedirs(key_dir, exist_ok=True)
+        # Write the key in full to a private temp file first, then link it into
+        # place, so no reader can ever see a partially written key
+        fd, tmp_path = tempfile.mkstemp(dir=key_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(key)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(tmp_path, SECRET_KEY_PATH)
+            except FileExistsError:
+                existing = _read_secret_key()
+                if existing:
+                    return existing  # Another process created it first; use theirs
+                os.replace(tmp_path, SECRET_KEY_PATH)  # Replace a truncated key file
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+    except OSError as e:
+        print(f"Could not persist secret key: {e}")
+    return key
+
+app.secret_key = load_secret_key()  # Required for flashing messages
+
+# Keep compiled template bytecode on disk so restarts skip recompiling. With no
+# directory argument Jinja uses a private per-user directory it creates with
+# mode 0700 and refuses if it's owned by someone else.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# A single shared connection avoids reopening the database (and its -wal/-shm
+# files) on every request. Access is serialized through _db_lock.
+_conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+_db_lock = threading.Lock()
+
+@contextmanager
+def db_transaction():
+    """Run the enclosed statements in a single transaction on the shared connection.
+    BEGIN IMMEDIATE takes the write lock up front, so a transaction never fails
+    halfway through on a lock held by another process.
+    """
+    with _db_lock:
+        _conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield _conn
+            _conn.execute('COMMIT')
+        except BaseException:
+            # Also covers a failed COMMIT, so the shared connection is never
+            # left inside an open transaction
+            if _conn.in_transaction:
+                _conn.execute('ROLLBACK')
+            raise
+
+# Process-wide systemd D-Bus handle, created on first use
+_systemd = None
+
+def restart_unbound_service():
+    """Restart the unbound service through systemd's D-Bus API when pystemd is
+    available, otherwise via systemctl.
+    """
+    global _systemd
+    if SystemdManager is None:
+        subprocess.run(['systemctl', 'restart', 'unbound'], check=True)
+        return
+    if _systemd is None:
+        _systemd = SystemdManager()
+        _systemd.load()
+    _systemd.Manager.RestartUnit(b'unbound.service', b'replace')
+
+def reload_unbound():
+    """Safely reload the unbound configuration using unbound-control.
+    Unlike a service restart, this keeps the process running. If
+    unbound-control is unavailable the service is restarted instead.
+    """
     try:
         # First check if the config is valid
         subprocess.run(['unbound-checkconf'], check=True)
-        # If config is valid, restart the service
-        subprocess.run(['systemctl', 'restart', 'unbound'], check=True)
+        # If config is valid, reload the service
+        try:
+            subprocess.run(['unbound-control', 'reload'], check=True)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            restart_unbound_service()
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"Error restarting unbound: {e}")
+    except Exception as e:
+        print(f"Error reloading unbound: {e}")
         return False
 
+def _unbound_add(domain, ttl, ip):
+    subprocess.run(['unbound-control', 'local_data', f'{domain} {ttl} IN A {ip}'], check=True)
+
+def _unbound_remove(domain):
+    subprocess.run(['unbound-control', 'local_data_remove', domain], check=True)
+
+def update_unbound_live(remove=None, add=None):
+    """Apply a single record change to unbound's in-memory zone without a reload.
+    remove is a domain to drop, add a (domain, ttl, ip) tuple to insert.
+    Returns False if unbound-control failed, in which case a full reload is needed.
+    """
+    try:
+        if remove:
+            _unbound_remove(remove)
+        if add:
+            _unbound_add(*add)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        print(f"Error updating unbound local data: {e}")
+        return False
+
+def validate_record(domain, record_type, value):
+    """Check form input before it reaches DNS or the database.
+    Returns an error message, or None if the record looks valid.
+    """
+    if not _DOMAIN_RE.match(domain):
+        return 'Invalid domain name'
+    if record_type == 'A':
+        try:
+            ipaddress.IPv4Address(value)
+        except ValueError:
+            return 'Invalid IPv4 address'
+    elif not _DOMAIN_RE.match(value):
+        return 'Invalid CNAME target'
+    return None
+
 def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute('''
+    with _db_lock:
+        _conn.execute('PRAGMA journal_mode=WAL')
+        _conn.execute('PRAGMA synchronous=NORMAL')
+        _conn.execute('PRAGMA temp_store=MEMORY')
+        _conn.execute('PRAGMA cache_size=-8000')
+        _conn.execute('''
             CREATE TABLE IF NOT EXISTS records (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 domain TEXT NOT NULL,
@@ -35,95 +204,292 @@ def init_db():
                 resolved_ip TEXT
             )
         ''')
+        # Serve the A-record duplicate check, the CNAME scans and the alias JOIN
+        _conn.execute('CREATE INDEX IF NOT EXISTS idx_type_value ON records(type, value)')
+        _conn.execute('CREATE INDEX IF NOT EXISTS idx_type_resolved_ip ON records(type, resolved_ip, domain)')
 
 def get_records():
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, domain, type, value, ttl, resolved_ip FROM records')
-        rows = cursor.fetchall()
+    """Return (a_records, cname_records) for the index page.
+    Each A record carries an 'aliases' list of the CNAMEs resolving to its IP;
+    cname_records holds only the CNAMEs that don't map to any A record.
+    """
+    with _db_lock:
+        cursor = _conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute('''
+            SELECT a.id, a.domain, a.value, a.ttl, (
+                -- Aggregate from an ordered subquery so aliases come out in id order
+                SELECT GROUP_CONCAT(domain, ',') FROM (
+                    SELECT c.domain FROM records c
+                    WHERE c.type = 'CNAME' AND c.resolved_ip = a.value
+                    ORDER BY c.id
+                )
+            ) AS aliases
+            FROM records a
+            WHERE a.type = 'A'
+            ORDER BY a.id
+        ''')
         # Convert to list of dicts for easier template handling
-        return [dict(r) for r in rows]
-
-def resolve_cname(cname_target):
-    """Resolve a CNAME target to its final A record IP address."""
+        a_records = []
+        for r in cursor:
+            a = dict(r)
+            a['aliases'] = a['aliases'].split(',') if a['aliases'] else []
+            a_records.append(a)
+        cursor.execute('''
+            SELECT id, domain, value, ttl, resolved_ip
+            FROM records c
+            WHERE c.type = 'CNAME' AND NOT EXISTS (
+                SELECT 1 FROM records a WHERE a.type = 'A' AND a.value = c.resolved_ip
+            )
+            ORDER BY c.id
+        ''')
+        cname_records = [dict(r) for r in cursor]
+    return a_records, cname_records
+
+# Shared resolver so /etc/resolv.conf is parsed once and dnspython's answer
+# cache survives between lookups
+_resolver = dns.resolver.Resolver()
+if UPSTREAM_NAMESERVERS:
+    _resolver.nameservers = UPSTREAM_NAMESERVERS
+_resolver.rotate = True
+_resolver.cache = dns.resolver.LRUCache(max_size=1024)
+_resolver.lifetime = 2.0
+
+def _resolve_uncached(cname_target):
+    """Resolve a CNAME target to (ip, ttl) by querying DNS."""
     try:
-        resolver = dns.resolver.Resolver()
-        # First try to resolve the CNAME chain to get the final hostname
-        try:
-            cname_answers = resolver.resolve(cname_target, 'CNAME')
-            # If there's a CNAME record, follow it
-            for rdata in cname_answers:
-                cname_target = str(rdata.target).rstrip('.')
-        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
-            pass  # No CNAME record, try resolving A record directly
-        
-        # Now resolve the A record
-        answers = resolver.resolve(cname_target, 'A')
-        return str(answers[0])  # Return the first IP address
+        # A single A query: the server follows any CNAME chain for us
+        answers = _resolver.resolve(cname_target, 'A')
+        ttl = min(CNAME_MAX_CACHE_TTL, answers.chaining_result.minimum_ttl)
+        return str(answers[0]), ttl  # Return the first IP address
     except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.Timeout) as e:
         raise ValueError(f"Could not resolve {cname_target}: {str(e)}")
 
+# target -> (resolved ip, monotonic expiry time), least recently used first
+_cname_cache = OrderedDict()
+_cname_cache_lock = threading.Lock()
+
+def resolve_cname(cname_target):
+    """Resolve a CNAME target to its final A record IP address.
+    Results are cached for the smallest TTL in the answer chain, capped at
+    CNAME_MAX_CACHE_TTL, keeping at most CNAME_CACHE_SIZE targets.
+    """
+    now = time.monotonic()
+    with _cname_cache_lock:
+        cached = _cname_cache.get(cname_target)
+        if cached and now < cached[1]:
+            _cname_cache.move_to_end(cname_target)
+            return cached[0]
+
+    ip, ttl = _resolve_uncached(cname_target)
+    with _cname_cache_lock:
+        _cname_cache[cname_target] = (ip, now + ttl)
+        _cname_cache.move_to_end(cname_target)
+        if len(_cname_cache) > CNAME_CACHE_SIZE:
+            _cname_cache.popitem(last=False)
+    return ip
+
+def invalidate_cname(cname_target):
+    """Drop any cached resolution for a CNAME target."""
+    with _cname_cache_lock:
+        _cname_cache.pop(cname_target, None)
+
+def _safe_resolve(cname):
+    """Resolve one (id, target, old_ip) row to (id, target, ip, old_ip); ip is None on failure."""
+    cid, target, old_ip = cname
+    try:
+        ip = resolve_cname(target)
+    except Exception:
+        ip = None
+    return cid, target, ip, old_ip
+
 def refresh_cname_resolutions():
     """Re-resolve all CNAME records and store their resolved IPs.
     If a CNAME cannot be resolved, its resolved_ip is set to NULL.
+    Returns True if any stored resolution changed.
     """
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, value FROM records WHERE type = 'CNAME'")
-        cnames = cursor.fetchall()
-        for cid, target in cnames:
-            try:
-                ip = resolve_cname(target)
-            except Exception:
-                ip = None
-            cursor.execute('UPDATE records SET resolved_ip = ? WHERE id = ?', (ip, cid))
-        conn.commit()
-
-def generate_unbound_config():
-    # Refresh CNAME resolutions so generated config is up-to-date
-    refresh_cname_resolutions()
-
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT domain, type, value, ttl, resolved_ip FROM records')
-        records = cursor.fetchall()
-
-        config_lines = []
-        config_lines.append('server:')
-        config_lines.append(f'\tlocal-zone: "{BASE_DOMAIN}." transparent')
-        for domain, record_type, value, ttl, resolved_ip in records:
-            if record_type == 'A':
-                config_lines.append(f'\tlocal-data: "{domain} {ttl} IN A {value}"')
-            elif record_type == 'CNAME' and resolved_ip:
-                # For CNAME records, write an A record using the resolved IP
-                config_lines.append(f'\tlocal-data: "{domain} {ttl} IN A {resolved_ip}"')
-
-    with open(UNBOUND_CONFIG_PATH, 'w') as f:
-        f.write('\n'.join(config_lines) + '\n')
-    
-    restart_unbound()
-
-@app.route('/')
-def index():
-    records = get_records()
-
-    # Group A records and attach any CNAME aliases that resolve to the same IP
-    a_records = [r for r in records if r['type'] == 'A']
-    cname_records = [r for r in records if r['type'] == 'CNAME']
+    with _db_lock:
+        cnames = _conn.execute("SELECT id, value, resolved_ip FROM records WHERE type = 'CNAME'").fetchall()
+    if not cnames:
+        return False
 
-    # Build alias list: for each A record, find CNAMEs whose resolved_ip == A.value
-    for a in a_records:
-        a['aliases'] = [c['domain'] for c in cname_records if c.get('resolved_ip') == a['value']]
+    # Resolve concurrently and outside the transaction so slow lookups
+    # neither serialize nor hold the database
+    with ThreadPoolExecutor(max_workers=min(CNAME_REFRESH_WORKERS, len(cnames))) as ex:
+        results = list(ex.map(_safe_resolve, cnames))
 
-    # Also collect standalone CNAMEs that don't map to any A record
-    mapped_cnames = set()
-    for a in a_records:
-        mapped_cnames.update(a['aliases'])
-    unmapped_cnames = [c for c in cname_records if c['domain'] not in mapped_cnames]
+    updates = [(ip, cid, target) for cid, target, ip, old_ip in results if ip != old_ip]
+    if not updates:
+        return False
+    with db_transaction() as conn:
+        # Only touch rows still pointing at the target we resolved; a record
+        # edited while the lookups ran keeps the resolution its edit stored
+        cursor = conn.executemany(
+            "UPDATE records SET resolved_ip = ? WHERE id = ? AND type = 'CNAME' AND value = ?",
+            updates
+        )
+        changed = cursor.rowcount > 0
+    if changed:
+        invalidate_index()
+    return changed
+
+def _cname_refresh_tick():
+    """Background job: refresh CNAME resolutions and regenerate the config on change."""
+    try:
+        if refresh_cname_resolutions():
+            generate_unbound_config()
+    except Exception as e:
+        print(f"Error refreshing CNAME resolutions: {e}")
+    finally:
+        schedule_cname_refresh()
+
+def schedule_cname_refresh():
+    timer = threading.Timer(CNAME_REFRESH_INTERVAL, _cname_refresh_tick)
+    timer.daemon = True
+    timer.start()
+
+# Digest of the config last successfully loaded into unbound
+_last_config_digest = None
+# Set when unbound's live data may differ from the config file, e.g. after a
+# failed reload; cleared only by a successful reload
+_unbound_stale = False
+_config_lock = threading.Lock()
+
+def generate_unbound_config(reload=None):
+    """Write the unbound config from the database.
+    reload=True always reloads unbound, for changes that could not be applied
+    live. reload=False only persists the file, for changes already applied
+    through update_unbound_live(). The default reloads if the config changed.
+    Whenever a previous reload failed, unbound is reloaded regardless.
+    """
+    global _last_config_digest, _unbound_stale
+
+    # Stream the config into a temp file next to the real one, hashing as we
+    # go, then atomically swap it in so unbound never sees a partial file.
+    # CNAME resolutions are kept current by the background refresh.
+    tmp_path = UNBOUND_CONFIG_PATH + '.tmp'
+    with _config_lock:
+        hasher = hashlib.blake2b(digest_size=16)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        with os.fdopen(fd, 'wb', buffering=64 * 1024) as f:
+            def emit(line):
+                data = line.encode()
+                hasher.update(data)
+                f.write(data)
+
+            emit('server:\n')
+            emit(f'\tlocal-zone: "{BASE_DOMAIN}." transparent\n')
+            with _db_lock:
+                # Iterate the cursor so each row is formatted and written
+                # without materializing the whole table
+                cursor = _conn.execute('SELECT domain, type, value, ttl, resolved_ip FROM records')
+                for domain, record_type, value, ttl, resolved_ip in cursor:
+                    if record_type == 'A':
+                        emit(f'\tlocal-data: "{domain} {ttl} IN A {value}"\n')
+                    elif record_type == 'CNAME' and resolved_ip:
+                        # For CNAME records, write an A record using the resolved IP
+                        emit(f'\tlocal-data: "{domain} {ttl} IN A {resolved_ip}"\n')
+
+            digest = hasher.digest()
+            changed = digest != _last_config_digest
+            needs_reload = reload or _unbound_stale or (reload is None and changed)
+            if changed or needs_reload:
+                f.flush()
+                os.fsync(f.fileno())
+
+        if not changed and not needs_reload:
+            os.unlink(tmp_path)
+            return  # Nothing changed, leave unbound alone
+
+        os.replace(tmp_path, UNBOUND_CONFIG_PATH)
+
+        if not needs_reload:
+            # The change is already live in unbound
+            _last_config_digest = digest
+        elif reload_unbound():
+            _last_config_digest = digest
+            _unbound_stale = False
+        else:
+            _unbound_stale = True
+
+def _reconcile_tick():
+    """Background job: make sure unbound serves what the database holds.
+    Retries failed reloads and picks up changes that were never applied.
+    """
+    try:
+        generate_unbound_config()
+    except Exception as e:
+        print(f"Error reconciling unbound config: {e}")
+    finally:
+        schedule_reconcile()
+
+def schedule_reconcile():
+    timer = threading.Timer(RECONCILE_INTERVAL, _reconcile_tick)
+    timer.daemon = True
+    timer.start()
+
+_regen_timer = None
+_regen_reload = False
+_regen_lock = threading.Lock()
+
+def _regen():
+    global _regen_reload
+    with _regen_lock:
+        reload, _regen_reload = _regen_reload, False
+    try:
+        generate_unbound_config(reload=reload)
+    except Exception as e:
+        print(f"Error generating unbound config: {e}")
 
+def schedule_regen(reload=True):
+    """Regenerate the unbound config once changes have settled.
+    Each call restarts the delay, so a burst of edits causes a single reload.
+    Pass reload=False when the change was already applied live; unbound is
+    then reloaded only if some other pending change needs it.
+    """
+    global _regen_timer, _regen_reload
+    with _regen_lock:
+        _regen_reload = _regen_reload or reload
+        if _regen_timer is not None:
+            _regen_timer.cancel()
+        _regen_timer = threading.Timer(REGEN_DELAY, _regen)
+        _regen_timer.daemon = True
+        _regen_timer.start()
+
+# Rendered index page, reused until the records change
+_index_html = None
+_index_version = 0
+_index_lock = threading.Lock()
+
+def invalidate_index():
+    """Discard the cached index page after the records change."""
+    global _index_html, _index_version
+    with _index_lock:
+        _index_html = None
+        _index_version += 1
+
+def render_index():
+    # A records come back with their CNAME aliases already attached
+    a_records, unmapped_cnames = get_records()
     return render_template('index.html', a_records=a_records, cname_records=unmapped_cnames)
 
+@app.route('/')
+def index():
+    global _index_html
+    # Pages carrying flash messages are rendered fresh and never cached
+    if session.get('_flashes'):
+        return render_index()
+
+    with _index_lock:
+        html, version = _index_html, _index_version
+    if html is None:
+        html = render_index()
+        with _index_lock:
+            # Only keep the page if no change landed while it was rendering
+            if version == _index_version:
+                _index_html = html
+    return html
+
 @app.route('/add', methods=['POST'])
 def add_record():
     try:
@@ -140,11 +506,16 @@ def add_record():
             flash('Invalid record type', 'error')
             return redirect(url_for('index'))
 
+        error = validate_record(domain, record_type, value)
+        if error:
+            flash(error, 'error')
+            return redirect(url_for('index'))
+
         resolved_ip = None
         # Prevent duplicate A record IPs
         if record_type == 'A':
-            with sqlite3.connect(DB_PATH) as conn:
-                cur = conn.cursor()
+            with _db_lock:
+                cur = _conn.cursor()
                 cur.execute("SELECT id FROM records WHERE type = 'A' AND value = ?", (value,))
                 if cur.fetchone():
                     flash('An A record with this IP already exists', 'error')
@@ -157,14 +528,17 @@ def add_record():
                 flash(f'Error resolving CNAME: {str(e)}', 'error')
                 return redirect(url_for('index'))
 
-        with sqlite3.connect(DB_PATH) as conn:
+        with db_transaction() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'INSERT INTO records (domain, type, value, ttl, resolved_ip) VALUES (?, ?, ?, ?, ?)',
                 (domain, record_type, value, ttl, resolved_ip)
             )
-        
-        generate_unbound_config()
+        invalidate_index()
+
+        ip = value if record_type == 'A' else resolved_ip
+        live = update_unbound_live(add=(domain, ttl, ip))
+        schedule_regen(reload=not live)
         flash('Record added successfully', 'success')
 
     except ValueError as e:
@@ -177,14 +551,14 @@ def add_record():
 
 @app.route('/edit/<int:record_id>', methods=['GET', 'POST'])
 def edit_record(record_id):
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    with _db_lock:
+        cursor = _conn.cursor()
+        cursor.row_factory = sqlite3.Row
         cursor.execute('SELECT id, domain, type, value, ttl FROM records WHERE id = ?', (record_id,))
         row = cursor.fetchone()
-        if not row:
-            flash('Record not found', 'error')
-            return redirect(url_for('index'))
+    if not row:
+        flash('Record not found', 'error')
+        return redirect(url_for('index'))
 
     if request.method == 'GET':
         record = dict(row)
@@ -201,16 +575,24 @@ def edit_record(record_id):
             flash('Invalid record type', 'error')
             return redirect(url_for('index'))
 
+        error = validate_record(domain, record_type, value)
+        if error:
+            flash(error, 'error')
+            return redirect(url_for('index'))
+
         resolved_ip = None
         # If setting to A, ensure no other A has same IP
         if record_type == 'A':
-            with sqlite3.connect(DB_PATH) as conn:
-                cur = conn.cursor()
+            with _db_lock:
+                cur = _conn.cursor()
                 cur.execute("SELECT id FROM records WHERE type = 'A' AND value = ? AND id != ?", (value, record_id))
                 if cur.fetchone():
                     flash('Another A record with this IP already exists', 'error')
                     return redirect(url_for('index'))
 
+        if row['type'] == 'CNAME':
+            invalidate_cname(row['value'])
+
         if record_type == 'CNAME':
             try:
                 resolved_ip = resolve_cname(value)
@@ -218,14 +600,32 @@ def edit_record(record_id):
                 flash(f'Error resolving CNAME: {str(e)}', 'error')
                 return redirect(url_for('index'))
 
-        with sqlite3.connect(DB_PATH) as conn:
+        with db_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                'UPDATE records SET domain = ?, type = ?, value = ?, ttl = ?, resolved_ip = ? WHERE id = ?',
-                (domain, record_type, value, ttl, resolved_ip, record_id)
-            )
-
-        generate_unbound_config()
+            # Re-read the record under the write lock; the earlier read may be stale
+            cursor.execute('SELECT domain, type, value FROM records WHERE id = ?', (record_id,))
+            current = cursor.fetchone()
+            if current:
+                cursor.execute(
+                    'UPDATE records SET domain = ?, type = ?, value = ?, ttl = ?, resolved_ip = ? WHERE id = ?',
+                    (domain, record_type, value, ttl, resolved_ip, record_id)
+                )
+                # local_data_remove drops every record for a name, so a shared
+                # name needs a full reload
+                cursor.execute('SELECT 1 FROM records WHERE domain = ? AND id != ?', (current[0], record_id))
+                shared = cursor.fetchone() is not None
+        if not current:
+            flash('Record not found', 'error')
+            return redirect(url_for('index'))
+        invalidate_index()
+        if current[1] == 'CNAME':
+            invalidate_cname(current[2])
+
+        live = False
+        if not shared:
+            ip = value if record_type == 'A' else resolved_ip
+            live = update_unbound_live(remove=current[0], add=(domain, ttl, ip))
+        schedule_regen(reload=not live)
         flash('Record updated successfully', 'success')
     except Exception as e:
         flash(f'Error updating record: {str(e)}', 'error')
@@ -235,11 +635,25 @@ def edit_record(record_id):
 @app.route('/delete/<int:record_id>', methods=['POST'])
 def delete_record(record_id):
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with db_transaction() as conn:
             cursor = conn.cursor()
-            cursor.execute('DELETE FROM records WHERE id = ?', (record_id,))
-            
-        generate_unbound_config()
+            cursor.execute('SELECT domain, type, value FROM records WHERE id = ?', (record_id,))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute('DELETE FROM records WHERE id = ?', (record_id,))
+                cursor.execute('SELECT 1 FROM records WHERE domain = ?', (row[0],))
+                shared = cursor.fetchone() is not None
+        if not row:
+            flash('Record not found', 'error')
+            return redirect(url_for('index'))
+        invalidate_index()
+        if row[1] == 'CNAME':
+            invalidate_cname(row[2])
+
+        live = False
+        if not shared:
+            live = update_unbound_live(remove=row[0])
+        schedule_regen(reload=not live)
         flash('Record deleted successfully', 'success')
     except Exception as e:
         flash(f'Error deleting record: {str(e)}', 'error')
@@ -248,6 +662,15 @@ def delete_record(record_id):
 
 if __name__ == '__main__':
     init_db()
+    # Full regeneration on startup; later changes are applied as deltas
+    generate_unbound_config()
+    schedule_cname_refresh()
+    schedule_reconcile()
     if not os.path.exists('templates'):
         os.makedirs('templates')
-    app.run(host='0.0.0.0', port=80)
+    # Caches and timers live in this process, so serve from one process with
+    # many threads rather than several worker processes
+    if serve is not None:
+        serve(app, host='0.0.0.0', port=80, threads=WEB_THREADS)
+    else:
+        app.run(host='0.0.0.0', port=80, threaded=True)